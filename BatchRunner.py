@@ -0,0 +1,113 @@
+import contextlib
+import os
+import random
+from GameManagement import Game, CardManager
+from Player import Player
+
+
+class BatchRunner:
+    """Plays headless AI-vs-AI games, one per seed, and reports compact results."""
+
+    def __init__(self, num_players=2, max_turns=1000, recorder=None, variant=None):
+        self.num_players = num_players
+        self.variant = variant  # Rules variant for every game, the base game if None
+        self.max_turns = max_turns  # Games still running after this many turns are reported as timeouts
+        self.recorder = recorder  # Attached to every game so it sees each decision point
+
+    def create_game(self, seed, listeners=()):
+        """
+        Seeds the global RNG and builds a dealt game with AI players only.
+        The listeners are attached before dealing so they see the starting hands.
+        """
+        random.seed(seed)
+        players = [Player(f"AI_{i}", None, is_ai=True) for i in range(self.num_players)]
+        game = Game(players, self.variant)
+        game.listeners.extend(listeners)
+        game.recorder = self.recorder
+        if self.recorder:
+            self.recorder.start_game(game)
+        CardManager.distribute_cards(game.players, game.deck, game.logger, game.rules.starting_cards)
+        return game
+
+    @staticmethod
+    def advance(game):
+        """Plays the current player's turn, or skips them if they're out. Returns whether a turn was played."""
+        turn_player = game.players[game.turn_manager.current_turn]
+        if turn_player.has_cards():
+            game.turn_manager.play_turn()
+            return True
+        game.turn_manager.next_turn()  # Eliminated players don't get a turn
+        return False
+
+    def play_game(self, seed):
+        """
+        Plays a single game and returns (seed, winner_index, turns, status, error).
+        The winner index is -1 if there is no winner, status is 'ok', 'timeout' or 'error',
+        and error names the exception for games that crashed.
+        """
+        game = self.create_game(seed)
+        turns = 0
+        try:
+            while not game.is_game_over():
+                if turns >= self.max_turns:
+                    if self.recorder:
+                        self.recorder.discard_game(game)
+                    return seed, -1, turns, 'timeout', None
+                if self.advance(game):
+                    turns += 1
+        except Exception as error:
+            if self.recorder:
+                self.recorder.discard_game(game)
+            return seed, -1, turns, 'error', f"{type(error).__name__}: {error}"
+
+        winner = next((i for i, player in enumerate(game.players) if player.has_cards()), -1)
+        if self.recorder:
+            self.recorder.finish_game(game, winner)
+        return seed, winner, turns, 'ok', None
+
+    def run(self, seeds):
+        """Plays a game for every seed with all game output silenced."""
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return [self.play_game(seed) for seed in seeds]
+
+    def summarize(self, results):
+        """Folds per-game results into a compact summary that can be merged with others."""
+        summary = {
+            'games': 0,
+            'wins': [0] * self.num_players,
+            'no_winner': 0,  # Finished games only, timeouts and errors are counted separately
+            'turns': 0,
+            'timeouts': [],  # Seeds are kept for failures so they can be replayed
+            'errors': [],  # [seed, "ExceptionType: message"] pairs
+        }
+        for seed, winner, turns, status, error in results:
+            summary['games'] += 1
+            summary['turns'] += turns
+            if status == 'timeout':
+                summary['timeouts'].append(seed)
+            elif status == 'error':
+                summary['errors'].append([seed, error])
+            elif winner >= 0:
+                summary['wins'][winner] += 1
+            else:
+                summary['no_winner'] += 1
+        return summary
+
+    @staticmethod
+    def merge_summaries(summaries):
+        """Combines several summaries produced by summarize into one."""
+        merged = None
+        for summary in summaries:
+            if merged is None:
+                merged = {key: list(value) if isinstance(value, list) else value for key, value in summary.items()}
+                continue
+            merged['games'] += summary['games']
+            merged['no_winner'] += summary['no_winner']
+            merged['turns'] += summary['turns']
+            merged['wins'] = [a + b for a, b in zip(merged['wins'], summary['wins'])]
+            merged['timeouts'].extend(summary['timeouts'])
+            merged['errors'].extend(summary['errors'])
+        if merged is not None:
+            merged['timeouts'].sort()
+            merged['errors'].sort()
+        return merged
@@ -52,6 +52,19 @@ class Ambassador(Character):
     def counteraction(self, acting_player, game):
         game.execute_counteraction('block_steal', acting_player, self)
 
+class Inquisitor(Character):
+    def __init__(self):
+        super().__init__('Inquisitor', 'teal')
+
+    def action(self, acting_player, game, target_player=None):
+        if target_player is not None:
+            game.execute_action('examine', acting_player, target_player)
+        else:
+            game.execute_action('exchange', acting_player)
+
+    def counteraction(self, acting_player, game):
+        game.execute_counteraction('block_steal', acting_player, self)
+
 class Contessa(Character):
     def __init__(self):
         super().__init__('Contessa', 'red')
@@ -0,0 +1,239 @@
+import argparse
+import json
+import multiprocessing
+import socket
+import threading
+import time
+from collections import deque
+from BatchRunner import BatchRunner
+
+
+def send_message(sock, message):
+    """Sends one newline-delimited JSON message."""
+    sock.sendall((json.dumps(message, separators=(',', ':')) + '\n').encode())
+
+
+class Coordinator:
+    """
+    Hands out seed ranges (shards) to workers over TCP and merges the summaries they send back.
+    Shards owned by a worker that disconnects or stops sending heartbeats are put back in the queue,
+    and idle workers steal a copy of the oldest in-flight shard once the queue runs dry.
+    """
+
+    def __init__(self, start, stop, shard_size=500, num_players=2, max_turns=1000,
+                 host='127.0.0.1', port=0, heartbeat_timeout=10.0):
+        self.num_players = num_players
+        self.max_turns = max_turns
+        self.heartbeat_timeout = heartbeat_timeout
+        self.shards = {}  # shard_id -> (start, stop)
+        for shard_id, shard_start in enumerate(range(start, stop, shard_size)):
+            self.shards[shard_id] = (shard_start, min(shard_start + shard_size, stop))
+        self.pending = deque(self.shards)
+        self.in_flight = {}  # shard_id -> set of worker ids currently playing it
+        self.results = {}  # shard_id -> summary
+        self.workers = {}  # worker id -> time of the last message received
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not self.shards:
+            self.finished.set()
+
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()
+
+    def serve(self):
+        """Serves workers until every shard has a result, then returns the merged summary."""
+        self.server.settimeout(0.2)
+        threading.Thread(target=self.reap_workers, daemon=True).start()
+        try:
+            while not self.finished.is_set():
+                try:
+                    connection, _ = self.server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self.handle_worker, args=(connection,), daemon=True).start()
+        finally:
+            self.server.close()
+        return self.summary()
+
+    def summary(self):
+        with self.lock:
+            return BatchRunner.merge_summaries(self.results[shard_id] for shard_id in sorted(self.results))
+
+    def handle_worker(self, connection):
+        worker_id = None
+        try:
+            with connection, connection.makefile('r') as reader:
+                for line in reader:
+                    message = json.loads(line)
+                    if worker_id is None:
+                        worker_id = message['worker']
+                    with self.lock:
+                        self.workers[worker_id] = time.monotonic()
+                    if message['type'] == 'request':
+                        send_message(connection, self.next_assignment(worker_id))
+                    elif message['type'] == 'result':
+                        self.record_result(worker_id, message['shard'], message['summary'])
+        except (OSError, ValueError):
+            pass  # A broken connection is handled the same way as a clean disconnect
+        finally:
+            if worker_id is not None:
+                self.drop_worker(worker_id)
+
+    def next_assignment(self, worker_id):
+        with self.lock:
+            if self.finished.is_set():
+                return {'type': 'done'}
+            if self.pending:
+                shard_id = self.pending.popleft()
+            else:
+                # Nothing left to hand out, so duplicate the oldest shard another worker hasn't finished yet
+                candidates = [shard for shard, owners in self.in_flight.items() if worker_id not in owners]
+                if not candidates:
+                    return {'type': 'wait'}
+                shard_id = min(candidates)
+            self.in_flight.setdefault(shard_id, set()).add(worker_id)
+            start, stop = self.shards[shard_id]
+            return {'type': 'shard', 'shard': shard_id, 'start': start, 'stop': stop,
+                    'num_players': self.num_players, 'max_turns': self.max_turns}
+
+    def record_result(self, worker_id, shard_id, summary):
+        with self.lock:
+            self.in_flight.pop(shard_id, None)
+            if shard_id in self.results:
+                return  # A stolen duplicate already reported; games are deterministic per seed
+            self.results[shard_id] = summary
+            if len(self.results) == len(self.shards):
+                self.finished.set()
+
+    def drop_worker(self, worker_id):
+        """Forgets a worker and re-queues any shard that only it was playing."""
+        with self.lock:
+            if self.workers.pop(worker_id, None) is None:
+                return
+            for shard_id in sorted(self.in_flight):
+                owners = self.in_flight[shard_id]
+                owners.discard(worker_id)
+                if not owners:
+                    del self.in_flight[shard_id]
+                    if shard_id not in self.results:
+                        self.pending.appendleft(shard_id)
+
+    def reap_workers(self):
+        """Drops workers whose heartbeats have stopped, even if their socket is still open."""
+        while not self.finished.wait(self.heartbeat_timeout / 4):
+            now = time.monotonic()
+            with self.lock:
+                silent = [worker for worker, seen in self.workers.items() if now - seen > self.heartbeat_timeout]
+            for worker_id in silent:
+                self.drop_worker(worker_id)
+
+
+class Worker:
+    """Pulls shards from a coordinator, plays them with a BatchRunner and streams back the summaries."""
+
+    def __init__(self, address, worker_id=None, heartbeat_interval=2.0, poll_interval=0.1):
+        self.address = tuple(address)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{multiprocessing.current_process().pid}"
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.send_lock = threading.Lock()  # Heartbeats and requests share one socket
+        self.stopped = threading.Event()
+
+    def send(self, sock, message):
+        message['worker'] = self.worker_id
+        with self.send_lock:
+            send_message(sock, message)
+
+    def heartbeat(self, sock):
+        while not self.stopped.wait(self.heartbeat_interval):
+            try:
+                self.send(sock, {'type': 'heartbeat'})
+            except OSError:
+                return
+
+    def run(self):
+        """Works until the coordinator says it's done or goes away. Returns the number of shards played."""
+        shards_played = 0
+        with socket.create_connection(self.address) as sock, sock.makefile('r') as reader:
+            threading.Thread(target=self.heartbeat, args=(sock,), daemon=True).start()
+            try:
+                while True:
+                    self.send(sock, {'type': 'request'})
+                    line = reader.readline()
+                    if not line:
+                        break  # Coordinator closed the connection
+                    assignment = json.loads(line)
+                    if assignment['type'] == 'done':
+                        break
+                    if assignment['type'] == 'wait':
+                        time.sleep(self.poll_interval)
+                        continue
+                    runner = BatchRunner(assignment['num_players'], assignment['max_turns'])
+                    results = runner.run(range(assignment['start'], assignment['stop']))
+                    self.send(sock, {'type': 'result', 'shard': assignment['shard'],
+                                     'summary': runner.summarize(results)})
+                    shards_played += 1
+            except OSError:
+                pass
+            finally:
+                self.stopped.set()
+        return shards_played
+
+
+def run_worker(address):
+    Worker(address).run()
+
+
+def run_local(start, stop, num_workers=4, shard_size=500, num_players=2, max_turns=1000):
+    """Runs a coordinator with num_workers worker processes on localhost and returns the merged summary."""
+    coordinator = Coordinator(start, stop, shard_size, num_players, max_turns)
+    processes = [multiprocessing.Process(target=run_worker, args=(coordinator.address,), daemon=True)
+                 for _ in range(num_workers)]
+    for process in processes:
+        process.start()
+    summary = coordinator.serve()
+    for process in processes:
+        process.join(timeout=5)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Spread batches of AI-vs-AI games across machines.")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    coordinator_parser = subparsers.add_parser('coordinator', help="Hand out seed ranges and collect results")
+    coordinator_parser.add_argument('--host', default='0.0.0.0')
+    coordinator_parser.add_argument('--port', type=int, default=5555)
+    coordinator_parser.add_argument('--games', type=int, default=10000)
+    coordinator_parser.add_argument('--first-seed', type=int, default=0)
+    coordinator_parser.add_argument('--shard-size', type=int, default=500)
+    coordinator_parser.add_argument('--players', type=int, default=2)
+
+    worker_parser = subparsers.add_parser('worker', help="Play shards handed out by a coordinator")
+    worker_parser.add_argument('--host', default='127.0.0.1')
+    worker_parser.add_argument('--port', type=int, default=5555)
+    worker_parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+
+    local_parser = subparsers.add_parser('local', help="Coordinator and workers on this machine")
+    local_parser.add_argument('--games', type=int, default=10000)
+    local_parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    local_parser.add_argument('--shard-size', type=int, default=500)
+    local_parser.add_argument('--players', type=int, default=2)
+
+    args = parser.parse_args()
+    started = time.perf_counter()
+    if args.mode == 'coordinator':
+        coordinator = Coordinator(args.first_seed, args.first_seed + args.games, args.shard_size,
+                                  args.players, host=args.host, port=args.port)
+        print(f"Coordinator listening on {coordinator.address[0]}:{coordinator.address[1]}")
+        print(json.dumps(coordinator.serve()))
+    elif args.mode == 'worker':
+        workers = [multiprocessing.Process(target=run_worker, args=((args.host, args.port),))
+                   for _ in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    else:
+        print(json.dumps(run_local(0, args.games, args.workers, args.shard_size, args.players)))
+    print(f"Finished in {time.perf_counter() - started:.2f}s")
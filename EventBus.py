@@ -0,0 +1,242 @@
+import argparse
+import itertools
+import json
+import socket
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+
+COALESCED_EVENTS = ['coins', 'cards']  # Only the latest value matters, so older queued ones can be replaced
+POLICIES = ['drop_oldest', 'drop_newest', 'coalesce']
+
+
+class Subscription:
+    """
+    A bounded queue of events for one spectator. Offering never blocks: when the queue is full the
+    policy decides what is lost, and the number of lost events is counted in dropped.
+
+    * drop_oldest - the oldest queued event makes room for the new one
+    * drop_newest - the new event is dropped
+    * coalesce - coins and cards updates replace the queued update for the same player in the same game, anything
+      else falls back to drop_oldest
+    """
+
+    def __init__(self, viewer=None, omniscient=False, policy='drop_oldest', max_queue=1000):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy}, expected one of {POLICIES}")
+        if not isinstance(max_queue, int) or isinstance(max_queue, bool) or max_queue < 1:
+            raise ValueError(f"max_queue must be a whole number of at least 1, got {max_queue!r}")
+        self.viewer = viewer  # Name of the player whose hidden cards this spectator may see
+        self.omniscient = omniscient  # Sees every hidden card and the raw log messages
+        self.policy = policy
+        self.max_queue = max_queue
+        self.queue = OrderedDict()
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def can_see(self, event):
+        return self.omniscient or (self.viewer is not None and event.get('player') == self.viewer)
+
+    def offer(self, event):
+        """Queues event for the spectator. Runs on the game thread, so a failure only loses the event."""
+        try:
+            self.enqueue(event)
+        except Exception:
+            self.dropped += 1
+
+    def enqueue(self, event):
+        key = event['seq']
+        if self.policy == 'coalesce' and event['event'] in COALESCED_EVENTS:
+            key = (event['game'], event['event'], event['player'])  # Seat names repeat across games
+        with self.condition:
+            if self.closed:
+                return
+            if key in self.queue:
+                self.queue[key] = event  # Keeps its place in the queue with the newer value
+                self.dropped += 1
+            else:
+                if len(self.queue) >= self.max_queue:
+                    self.dropped += 1
+                    if self.policy == 'drop_newest':
+                        return
+                    self.queue.popitem(last=False)
+                self.queue[key] = event
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Waits for the next event. Returns None on timeout or once the subscription is closed and drained."""
+        with self.condition:
+            if not self.queue and not self.closed:
+                self.condition.wait(timeout)
+            if not self.queue:
+                return None
+            return self.queue.popitem(last=False)[1]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class EventBus:
+    """
+    Turns game, player and log events into plain dicts and fans them out to every subscription.
+    Publishing happens on the game thread but only ever appends to bounded queues, so a slow
+    spectator can lose events but never slow down TurnManager.play_turn.
+    """
+
+    def __init__(self):
+        self.subscriptions = ()  # Replaced rather than mutated so publishing needs no lock
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()
+        self.game_number = 0
+
+    def attach(self, game):
+        """Starts publishing the events of game, tagged with a number of its own."""
+        self.game_number += 1
+        game.listeners.append(partial(self.on_event, self.game_number))
+
+    def subscribe(self, **options):
+        subscription = Subscription(**options)
+        with self.lock:
+            self.subscriptions = self.subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions = tuple(s for s in self.subscriptions if s is not subscription)
+        subscription.close()
+
+    def on_event(self, game_number, event, player, **details):
+        subscriptions = self.subscriptions
+        if not subscriptions:
+            return
+        public, hidden = self.describe(game_number, event, player, details)
+        full = dict(public, **hidden) if hidden else public
+        for subscription in subscriptions:
+            if event == 'log' and not subscription.omniscient:
+                continue  # Log messages can name hidden cards
+            subscription.offer(full if hidden and subscription.can_see(public) else public)
+
+    def describe(self, game_number, event, player, details):
+        """Splits an event into what every spectator may see and what only its owner may see."""
+        public = {'seq': next(self.sequence), 'game': game_number, 'time': time.time(), 'event': event,
+                  'player': player.name if player is not None else None}
+        hidden = {}
+        if event == 'coins':
+            public['coins'] = player.coins
+        elif event == 'cards':
+            public['influence'] = len(player.cards)
+            hidden['cards'] = list(player.cards)
+        elif event == 'influence_lost':
+            public['card'] = details['card']  # Lost influence is turned face up
+            public['influence'] = len(player.cards)
+        elif event in ('action', 'block', 'challenge'):
+            target = details.get('target')
+            public['action'] = details['action']
+            public['target'] = target.name if target is not None else None
+        elif event == 'deck':
+            public['count'] = details['count']  # Everyone sees the deck grow and shrink, not which card moved
+            hidden['card'] = details['card']
+        elif event == 'turn':
+            public['turn'] = details['turn']
+        elif event == 'log':
+            public['message'] = details['message']
+        return public, hidden
+
+
+class SpectatorServer:
+    """
+    Streams a bus's events to TCP clients as newline-delimited JSON. A client may first send one JSON
+    line with subscribe options, e.g. {"policy": "coalesce", "max_queue": 100}. Clients can only ask
+    to see a player's cards with {"viewer": "AI_0"} if the server was started with allow_viewers.
+    Each client gets its own thread, so a stalled socket only holds up that client.
+    """
+
+    def __init__(self, bus, host='127.0.0.1', port=0, handshake_timeout=1.0, allow_viewers=False):
+        self.bus = bus
+        self.allow_viewers = allow_viewers  # Clients aren't authenticated, so anyone could claim to be a player
+        self.handshake_timeout = handshake_timeout
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()
+        self.stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.serve, daemon=True).start()
+        return self
+
+    def serve(self):
+        self.server.settimeout(0.2)
+        while not self.stopped.is_set():
+            try:
+                connection, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self.handle_spectator, args=(connection,), daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        self.server.close()
+
+    def read_options(self, connection):
+        connection.settimeout(self.handshake_timeout)
+        try:
+            line = connection.makefile('r').readline()
+            options = json.loads(line) if line.strip() else {}
+        except (socket.timeout, ValueError):
+            options = {}
+        connection.settimeout(None)
+        allowed = {'policy', 'max_queue'}  # Omniscient spectators are only available in-process
+        if self.allow_viewers:
+            allowed.add('viewer')
+        return {key: value for key, value in options.items() if key in allowed}
+
+    def handle_spectator(self, connection):
+        with connection:
+            try:
+                subscription = self.bus.subscribe(**self.read_options(connection))
+            except (TypeError, ValueError) as error:
+                connection.sendall((json.dumps({'error': str(error)}) + '\n').encode())
+                return
+            try:
+                while not self.stopped.is_set():
+                    event = subscription.get(timeout=0.5)
+                    if event is not None:
+                        connection.sendall((json.dumps(event) + '\n').encode())
+            except OSError:
+                pass  # Spectator went away
+            finally:
+                self.bus.unsubscribe(subscription)
+
+
+if __name__ == '__main__':
+    import contextlib
+    import os
+    from BatchRunner import BatchRunner
+
+    parser = argparse.ArgumentParser(description="Play AI games and stream their events to spectators over TCP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5556)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--delay', type=float, default=0.5, help="Seconds between turns so people can follow along")
+    args = parser.parse_args()
+
+    bus = EventBus()
+    server = SpectatorServer(bus, args.host, args.port).start()
+    print(f"Spectators can connect to {server.address[0]}:{server.address[1]}")
+    runner = BatchRunner(args.players)
+    for seed in itertools.count():
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            game = runner.create_game(seed)
+            bus.attach(game)
+            for player in game.players:
+                player.notify('cards')  # The cards were dealt before the bus was attached
+            while not game.is_game_over():
+                if runner.advance(game):
+                    time.sleep(args.delay)
+            game.announce_winner()
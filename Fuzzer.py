@@ -0,0 +1,237 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from collections import Counter
+from BatchRunner import BatchRunner
+from Variants import BASE_GAME, VARIANTS
+
+
+class GameFuzzer:
+    """
+    Plays random AI games and checks cheap invariants after every turn:
+
+    * card conservation - the cards in hands, the deck and revealed piles add up to the starting deck
+    * influence - no player holds more than their starting cards between their hand and revealed pile
+    * coins - no player has negative coins
+    * turn index - always points at a seat
+    * termination - the game ends within max_turns
+
+    A crash inside the engine counts as a violation too. Each violation comes back with the seed and the
+    event trace of the game so it can be replayed.
+    """
+
+    def __init__(self, num_players=2, max_turns=1000, variant=None):
+        self.runner = BatchRunner(num_players, max_turns, variant=variant)
+        self.variant = variant or BASE_GAME
+        self.max_turns = max_turns
+
+    def check(self, game, card_total):
+        """Returns a (kind, message) pair for every invariant the game currently breaks."""
+        broken = []
+        cards = len(game.deck)
+        starting_cards = game.rules.starting_cards
+        for player in game.players:
+            held = len(player.cards) + len(player.revealed)
+            if held > starting_cards:
+                broken.append(('influence', f"{player.name} holds {held} cards including revealed ones"))
+            if player.coins < 0:
+                broken.append(('coins', f"{player.name} has {player.coins} coins"))
+            cards += held
+        if cards != card_total:
+            broken.append(('card_conservation', f"{cards} cards in play, expected {card_total}"))
+        if not 0 <= game.turn_manager.current_turn < len(game.players):
+            broken.append(('turn_index', f"Turn index {game.turn_manager.current_turn} is out of range"))
+        return broken
+
+    def check_composition(self, game, composition):
+        """The slower card-by-card version of the conservation check, run once at the end of a game."""
+        cards = sorted(game.deck)
+        for player in game.players:
+            cards.extend(player.cards)
+            cards.extend(player.revealed)
+        if sorted(cards) != composition:
+            return [('card_conservation', "The cards in play don't match the starting deck")]
+        return []
+
+    def play(self, seed):
+        """
+        Plays one game and returns (violations, trace). The game carries on after an invariant breaks so
+        other kinds of violation still get found, and each kind is only reported the first time it happens.
+        Violations are (kind, message, turns, traceback) and the trace holds one entry per game event.
+        """
+        trace = []
+        game = self.runner.create_game(seed, [lambda event, player, **details: trace.append(
+            self.describe(event, player, details))])
+        composition = sorted(game.deck + [card for player in game.players for card in player.cards])
+        violations = []
+        seen = set()
+
+        def record(broken, turns, stack=None):
+            for kind, message in broken:
+                if kind not in seen:
+                    seen.add(kind)
+                    violations.append((kind, message, turns, stack))
+
+        turns = 0
+        try:
+            record(self.check(game, len(composition)), turns)
+            while not game.is_game_over():
+                if turns >= self.max_turns:
+                    record([('termination', f"Game still running after {turns} turns")], turns)
+                    return violations, trace
+                if self.runner.advance(game):
+                    turns += 1
+                record(self.check(game, len(composition)), turns)
+            record(self.check_composition(game, composition), turns)
+        except Exception as error:
+            record([('crash', f"{type(error).__name__}: {error}")], turns, traceback.format_exc())
+        return violations, trace
+
+    def fuzz_game(self, seed):
+        """Plays one game and returns a full report, trace included, for each violation."""
+        violations, trace = self.play(seed)
+        return [self.report(seed, violation, trace) for violation in violations]
+
+    def report(self, seed, violation, trace):
+        kind, message, turns, stack = violation
+        return {
+            'seed': seed,
+            'num_players': self.runner.num_players,
+            'max_turns': self.max_turns,
+            'variant': self.variant.name,  # Replays have to use the same rules
+            'turns': turns,
+            'kind': kind,
+            'message': message,
+            'traceback': stack,
+            'trace': trace,
+        }
+
+    @staticmethod
+    def describe(event, player, details):
+        """
+        A JSON-friendly snapshot of one event, with the player's coins and cards at that moment
+        so a dump can be read without replaying it.
+        """
+        entry = {'event': event}
+        if player is not None:
+            entry['player'] = player.name
+            entry['coins'] = player.coins
+            entry['cards'] = list(player.cards)
+        for key, value in details.items():
+            entry[key] = value.name if hasattr(value, 'name') else value
+        return entry
+
+    def run(self, seeds, samples_per_violation=3):
+        """
+        Fuzzes every seed with game output silenced. Returns the number of games, how often each
+        (kind, message) violation happened, and full reports for the first few of each.
+        """
+        counts = Counter()
+        samples = []
+        games = 0
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for seed in seeds:
+                games += 1
+                violations, trace = self.play(seed)
+                for violation in violations:
+                    key = violation[:2]
+                    counts[key] += 1
+                    if counts[key] <= samples_per_violation:
+                        samples.append(self.report(seed, violation, trace))
+        return games, counts, samples
+
+
+def dump_violation(violation, dump_dir):
+    os.makedirs(dump_dir, exist_ok=True)
+    path = os.path.join(dump_dir, f"violation_seed{violation['seed']}_{violation['kind']}.json")
+    with open(path, 'w') as dump:
+        json.dump(violation, dump, indent=1)
+    return path
+
+
+def replay(path):
+    """Replays a dumped violation with the game's output shown. Returns the report for the same kind, or None if it's fixed."""
+    with open(path) as dump:
+        violation = json.load(dump)
+    fuzzer = GameFuzzer(violation['num_players'], violation['max_turns'], VARIANTS[violation.get('variant', 'base')])
+    return next((found for found in fuzzer.fuzz_game(violation['seed']) if found['kind'] == violation['kind']), None)
+
+
+def fuzz_range(start, stop, num_players, max_turns, samples_per_violation, variant=None):
+    return GameFuzzer(num_players, max_turns, variant).run(range(start, stop), samples_per_violation)
+
+
+def fuzz(games, first_seed=0, num_players=2, max_turns=1000, workers=1, dump_dir=None, chunk_size=2000,
+         samples_per_violation=3, variant=None):
+    """
+    Fuzzes games under variant (the base game if None) across worker processes. Only the first samples_per_violation reports of each distinct
+    (kind, message) are kept and dumped to dump_dir, the rest are just counted. Returns a report with
+    games per hour, the counts and the kept samples.
+    """
+    started = time.perf_counter()
+    jobs = [(start, min(start + chunk_size, first_seed + games), num_players, max_turns, samples_per_violation, variant)
+            for start in range(first_seed, first_seed + games, chunk_size)]
+    if workers == 1:
+        parts = [fuzz_range(*job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            parts = pool.starmap(fuzz_range, jobs)
+    seconds = time.perf_counter() - started
+
+    counts = Counter()
+    samples = []
+    kept = Counter()
+    for _, part_counts, part_samples in parts:
+        counts.update(part_counts)
+        for sample in part_samples:
+            key = (sample['kind'], sample['message'])
+            if kept[key] < samples_per_violation:
+                kept[key] += 1
+                samples.append(sample)
+                if dump_dir:
+                    sample['path'] = dump_violation(sample, dump_dir)
+    played = sum(part[0] for part in parts)
+    return {
+        'games': played,
+        'seconds': seconds,
+        'games_per_hour': played / seconds * 3600 if seconds else 0.0,
+        'counts': [{'kind': kind, 'message': message, 'count': count} for (kind, message), count in counts.most_common()],
+        'samples': samples,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fuzz the rules engine with random games and check invariants.")
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--dump-dir', default='fuzz_violations')
+    parser.add_argument('--samples', type=int, default=3, help="Games dumped per distinct violation")
+    parser.add_argument('--variant', default='base', choices=list(VARIANTS))
+    parser.add_argument('--replay', help="Replay a dumped violation instead of fuzzing")
+    args = parser.parse_args()
+
+    if args.replay:
+        found = replay(args.replay)
+        print(f"Still broken: {found['kind']} - {found['message']}" if found else "No longer reproduces")
+    else:
+        report = fuzz(args.games, args.first_seed, args.players, args.max_turns, args.workers, args.dump_dir,
+                      samples_per_violation=args.samples, variant=VARIANTS[args.variant])
+        print(f"{report['games']} games in {report['seconds']:.1f}s ({report['games_per_hour']:,.0f} games/hour)")
+        if not report['counts']:
+            print("No violations")
+        by_kind = Counter()
+        for violation in report['counts']:
+            by_kind[violation['kind']] += violation['count']
+        for kind, count in by_kind.most_common():
+            print(f"{kind}: {count} games ({count / report['games']:.1%})")
+        for violation in report['counts']:
+            print(f"  {violation['count']:>8} x {violation['kind']} - {violation['message']}")
+        if report['samples'] and args.dump_dir:
+            print(f"Dumped {len(report['samples'])} sample games to {args.dump_dir}")
@@ -1,11 +1,14 @@
 class GameLogger:
     def __init__(self):
         self.logs = []
+        self.listeners = []  # Called as listener('log', None, message=message) for every message
 
     def log(self, message):
         """Logs a message."""
         self.logs.append(message)
         print(message)  # Optionally, print the message in real-time
+        for listener in self.listeners:
+            listener('log', None, message=message)
 
     def get_logs(self):
         """Returns all the logs."""
@@ -1,23 +1,53 @@
 from GameLogger import GameLogger
+from Variants import BASE_GAME
 import random
 
 class Game:
-    def __init__(self, players):
+    def __init__(self, players, variant=None):
         self.players = players
+        self.variant = variant or BASE_GAME
+        self.rules = self.variant.compile()  # Everything below reads the variant through these lookup tables
+        for player in self.players:
+            player.coins = self.rules.starting_coins
         self.logger = GameLogger()
-        self.deck = CardManager.initialize_deck()
+        self.deck = CardManager.initialize_deck(self.rules)
         self.turn_manager = TurnManager(self)
         self.action_handler = ActionHandler(self)
         self.challenge_handler = ChallengeHandler(self)
+        self.recorder = None  # Optional decision recorder, e.g. for self-play datasets
+        self.listeners = []  # Called as listener(event, player, **details) for every game and player event
+        for player in self.players:
+            player.listeners.append(self.notify)
+        self.logger.listeners.append(self.notify)
+        self.deck.listeners.append(self.notify)
+
+    def notify(self, event, player=None, **details):
+        """Passes a game event, or one forwarded from a player, on to every listener."""
+        for listener in self.listeners:
+            listener(event, player, **details)
 
     def action_requires_coins(self, action):
         """Check if the given action requires coins."""
-        actions_requiring_coins = ['coup', 'assassinate']
-        return action in actions_requiring_coins
+        return action in self.rules.action_costs
+
+    def execute_action(self, action, acting_player, target_player=None):
+        """Entry point for Character.action, runs the action through the ActionHandler."""
+        if target_player is not None:
+            return self.action_handler.handle_action(acting_player, (action, target_player))
+        return self.action_handler.handle_action(acting_player, action)
+
+    def execute_counteraction(self, counteraction, acting_player, character):
+        """Entry point for Character.counteraction. Returns whether the character can make this counteraction."""
+        allowed = character.name in self.rules.action_to_cards.get(counteraction, ())
+        if allowed:
+            self.logger.log(f"{acting_player.name} uses {character.name} to {counteraction}.")
+        else:
+            self.logger.log(f"{character.name} can't {counteraction} in the {self.rules.name} rules.")
+        return allowed
 
     def start_game(self):
         self.logger.log("Game has started")
-        CardManager.distribute_cards(self.players, self.deck, self.logger)
+        CardManager.distribute_cards(self.players, self.deck, self.logger, self.rules.starting_cards)
         while not self.is_game_over():
             self.turn_manager.play_turn()
         self.announce_winner()
@@ -30,6 +60,7 @@ class Game:
 
     def announce_winner(self):
         winner = next((player for player in self.players if player.has_cards()), None)
+        self.notify('game_over', winner)
         if winner:
             self.logger.log(f"Game over! The winner is {winner.name}.")
         else:
@@ -50,13 +81,16 @@ class Game:
     def reset_game(self):
         self.logger.log("Resetting game...")
         # Reset the game state
-        self.deck = CardManager.initialize_deck()
+        self.deck = CardManager.initialize_deck(self.rules)
+        self.deck.listeners.append(self.notify)
         for player in self.players:
             player.cards = []
-            player.coins = 2
-        # Now pass the logger to the distribute_cards method
-        CardManager.distribute_cards(self.players, self.deck, self.logger)
+            player.revealed = []
+            player.coins = self.rules.starting_coins
         self.turn_manager.current_turn = 0
+        self.notify('reset')
+        # Now pass the logger to the distribute_cards method
+        CardManager.distribute_cards(self.players, self.deck, self.logger, self.rules.starting_cards)
         self.start_game()
 
     def choose_target(self, acting_player):
@@ -90,6 +124,8 @@ class TurnManager:
         action_successful = False  # Initialize action_successful
         while not action_successful:
             action = turn_player.choose_action(self.game)
+            if self.game.recorder:
+                self.game.recorder.record_action(self.game, turn_player, action)
             action_result = self.game.action_handler.handle_action(turn_player, action)
 
             # Ensure action_result is a tuple for consistency
@@ -106,18 +142,23 @@ class TurnManager:
                 self.game.logger.log(f"Action failed. Reason: {reason}")
                 if reason not in ['insufficient_coins', 'no_target']:
                     break  # End turn on block or challenge failure
+                if self.game.recorder:
+                    self.game.recorder.discard_action()  # The player picks again, so this wasn't a real decision
 
         self.next_turn()
 
 
     def next_turn(self):
         self.current_turn = (self.current_turn + 1) % len(self.game.players)
+        self.game.notify('turn', turn=self.current_turn)
         self.game.logger.log(f"Turn moves to player index {self.current_turn}.")
 
 
 class ActionHandler:
     def __init__(self, game):
         self.game = game
+        # Only the variant's actions get a handler, looked up once here rather than on every action
+        self.handlers = {action: getattr(self, action) for action in game.rules.actions}
 
     def handle_action(self, player, action):
         # Extract action and target if action is a tuple (for actions like coup, assassinate, steal)
@@ -126,23 +167,14 @@ class ActionHandler:
             action, target = action
 
         self.game.logger.log(f"{player.name} decides to perform action: {action}")
+        self.game.notify('action', player, action=action, target=target)
         # Match the action to the corresponding method
-        if action == 'income':
-            return self.income(player)
-        elif action == 'foreign_aid':
-            return self.foreign_aid(player)
-        elif action == 'coup':
-            return self.coup(player, target)
-        elif action == 'tax':
-            return self.tax(player)
-        elif action == 'assassinate':
-            return self.assassinate(player, target)  # Pass target as a separate argument
-        elif action == 'steal':
-            return self.steal(player, target)  # Pass target as a separate argument
-        elif action == 'exchange':
-            return self.exchange(player)
-        else:
+        handler = self.handlers.get(action)
+        if handler is None:
             return False, 'invalid_action'
+        if action in self.game.rules.targeted_actions:
+            return handler(player, target)  # Pass target as a separate argument
+        return handler(player)
 
     def income(self, player):
         self.game.logger.log(f"{player.name} takes Income action.")
@@ -159,7 +191,8 @@ class ActionHandler:
 
     def coup(self, player, target=None):
         self.game.logger.log(f"{player.name} attempts Coup action.")
-        if player.coins < 7:
+        cost = self.game.rules.action_costs['coup']
+        if player.coins < cost:
             self.game.logger.log(f"{player.name} does not have enough coins to perform a Coup.")
             return False, 'insufficient_coins'
 
@@ -172,7 +205,7 @@ class ActionHandler:
             self.game.logger.log("No target specified for Coup.")
             return False, 'no_target'
 
-        player.lose_coins(7)
+        player.lose_coins(cost)
         target.lose_influence()
 
         return True, 'success'
@@ -186,7 +219,8 @@ class ActionHandler:
 
     def assassinate(self, player, target=None):
         self.game.logger.log(f"{player.name} attempts Assassinate action.")
-        if player.coins < 3:
+        cost = self.game.rules.action_costs['assassinate']
+        if player.coins < cost:
             self.game.logger.log(f"{player.name} does not have enough coins to perform an Assassination.")
             return False, 'insufficient_coins'
 
@@ -199,7 +233,7 @@ class ActionHandler:
             self.game.logger.log("No target specified for Assassinate.")
             return False, 'no_target'
 
-        player.lose_coins(3)
+        player.lose_coins(cost)
         if not self.game.challenge_handler.check_block(player, 'assassinate'):
             target.lose_influence()
             return True, 'success'
@@ -233,7 +267,7 @@ class ActionHandler:
         if self.game.challenge_handler.resolve_challenge(player, 'exchange'):
             return (False, 'challenge_failed')  # Unsuccessful if challenged and lost
 
-        num_cards_to_exchange = min(len(player.cards), 2)  # Number of cards to exchange
+        num_cards_to_exchange = min(len(player.cards), self.game.rules.exchange_cards)  # Number of cards to exchange
 
         # Check if the player is AI
         if player.is_ai:
@@ -269,12 +303,42 @@ class ActionHandler:
         random.shuffle(self.game.deck)  # Shuffle the deck after the exchange
 
         # Display player's new cards after exchange
+        player.notify('cards')
         if not player.is_ai:
             print(f"{player.name}'s new cards: {', '.join(player.cards)}")
         self.game.logger.log(f"{player.name} has exchanged cards.")
         
         return True  # Successful exchange
 
+    def examine(self, player, target=None):
+        """Inquisitor action: look at one of the target's cards and maybe force them to swap it with the deck."""
+        self.game.logger.log(f"{player.name} attempts Examine action.")
+
+        if not player.is_ai and target is None:
+            target = self.game.choose_target(player)
+
+        if target is None or not target.cards:
+            self.game.logger.log("No target specified for Examine.")
+            return False, 'no_target'
+
+        if self.game.challenge_handler.resolve_challenge(player, 'examine'):
+            return (False, 'challenge_failed')
+
+        examined_card = random.choice(target.cards)
+        if player.is_ai:
+            force_exchange = random.choice([True, False])
+        else:
+            print(f"{target.name} shows you: {examined_card}")
+            force_exchange = input(f"Force {target.name} to exchange it? (yes/no): ").lower().strip() == 'yes'
+
+        if force_exchange:
+            target.cards.remove(examined_card)
+            self.game.deck.append(examined_card)
+            random.shuffle(self.game.deck)
+            target.draw_card(self.game.deck)
+            self.game.logger.log(f"{player.name} makes {target.name} exchange the examined card.")
+        return True, 'success'
+
 
 class ChallengeHandler:
     def __init__(self, game):
@@ -283,7 +347,13 @@ class ChallengeHandler:
     def check_block(self, acting_player, action):
         self.game.logger.log(f"Checking for blocks against {acting_player.name}'s action: {action}")
         for player in self.game.players:
-            if player != acting_player and player.wants_to_block(acting_player, action):
+            if player == acting_player or not player.has_cards():
+                continue  # Eliminated players can't block or challenge any more
+            wants_to_block = player.wants_to_block(acting_player, action)
+            if self.game.recorder:
+                self.game.recorder.record_reaction(self.game, player, acting_player, action, 'block', wants_to_block)
+            if wants_to_block:
+                self.game.notify('block', player, action=action, target=acting_player)
                 self.game.logger.log(f"{player.name} is attempting to block {acting_player.name}'s {action}.")
                 if self.resolve_block(acting_player, player, action) is None:
                     self.game.logger.log("Error resolving block. Continuing without block.")
@@ -294,10 +364,13 @@ class ChallengeHandler:
     def resolve_block(self, acting_player, blocking_player, action):
         self.game.logger.log(f"{acting_player.name} is facing a block attempt by {blocking_player.name} on {action}.")
         challenge_decision = acting_player.wants_to_challenge(blocking_player, 'block')
+        if self.game.recorder and challenge_decision is not None:
+            self.game.recorder.record_reaction(self.game, acting_player, blocking_player, 'block', 'challenge', challenge_decision)
         if challenge_decision is None:
             self.game.logger.log(f"Error getting {acting_player.name}'s decision to challenge the block.")
             return None
         if challenge_decision:
+            self.game.notify('challenge', acting_player, action='block', target=blocking_player)
             self.game.logger.log(f"{acting_player.name} challenges {blocking_player.name}'s block!")
             return self.challenge_action(blocking_player, acting_player, 'block')
         return True  # Block is successful if not challenged
@@ -305,7 +378,13 @@ class ChallengeHandler:
     def resolve_challenge(self, acting_player, action):
         self.game.logger.log(f"Resolving challenges against {acting_player.name}'s action: {action}")
         for player in self.game.players:
-            if player != acting_player and player.wants_to_challenge(acting_player, action):
+            if player == acting_player or not player.has_cards():
+                continue  # Eliminated players can't block or challenge any more
+            wants_to_challenge = player.wants_to_challenge(acting_player, action)
+            if self.game.recorder:
+                self.game.recorder.record_reaction(self.game, player, acting_player, action, 'challenge', wants_to_challenge)
+            if wants_to_challenge:
+                self.game.notify('challenge', player, action=action, target=acting_player)
                 self.game.logger.log(f"{player.name} challenges {acting_player.name}'s {action}!")
                 if self.challenge_action(acting_player, player, action) is None:
                     self.game.logger.log("Error resolving challenge. Continuing without resolution.")
@@ -315,7 +394,7 @@ class ChallengeHandler:
 
     def challenge_action(self, acting_player, challenging_player, action):
         self.game.logger.log(f"{acting_player.name} is being challenged by {challenging_player.name} on {action}.")
-        is_bluffing = not acting_player.verify_card(action)
+        is_bluffing = not acting_player.verify_card(action, self.game.rules.action_to_cards)
         if is_bluffing is None:
             self.game.logger.log("Error verifying card in challenge.")
             return None
@@ -330,7 +409,7 @@ class ChallengeHandler:
 
             # Shuffle and draw a new card for the acting player, if they have less than 2 cards
             if len(acting_player.cards) < 2:
-                acting_player.shuffle_in_card(action, self.game.deck)
+                acting_player.shuffle_in_card(action, self.game.deck, self.game.rules.action_to_cards)
                 acting_player.draw_card(self.game.deck)
 
             if action == 'block':
@@ -342,18 +421,47 @@ class ChallengeHandler:
 
 
 
+class Deck(list):
+    """
+    A list of cards that tells its listeners whenever a card goes in or out, as
+    listener('deck', None, card=card, count=1 or -1). Shuffling doesn't change what's in it, so isn't reported.
+    """
+    def __init__(self, cards=()):
+        super().__init__(cards)
+        self.listeners = []
+
+    def notify(self, card, count):
+        for listener in self.listeners:
+            listener('deck', None, card=card, count=count)
+
+    def pop(self, index=-1):
+        card = super().pop(index)
+        self.notify(card, -1)
+        return card
+
+    def append(self, card):
+        super().append(card)
+        self.notify(card, 1)
+
+    def extend(self, cards):
+        cards = list(cards)
+        super().extend(cards)
+        for card in cards:
+            self.notify(card, 1)
+
+
 class CardManager:
     @staticmethod
-    def initialize_deck():
-        characters = ['Duke', 'Assassin', 'Captain', 'Ambassador', 'Contessa']
-        deck = characters * 3
+    def initialize_deck(rules=None):
+        deck = Deck((rules or BASE_GAME.compile()).deck)
         random.shuffle(deck)
         return deck
 
     @staticmethod
-    def distribute_cards(players, deck, logger):
+    def distribute_cards(players, deck, logger, starting_cards=2):
         for player in players:
-            player.cards = [deck.pop() for _ in range(2)]
+            player.cards = [deck.pop() for _ in range(starting_cards)]
+            player.notify('cards')
             if player.is_ai:
                 logger.log(f"{player.name} received initial cards.")
             else:
@@ -0,0 +1,137 @@
+from collections import Counter
+import numpy as np
+
+
+ROLES = ['Duke', 'Assassin', 'Captain', 'Ambassador', 'Contessa']
+ACTIONS = ['income', 'foreign_aid', 'coup', 'tax', 'assassinate', 'steal', 'exchange']
+HISTORY_EVENTS = ACTIONS + ['block', 'challenge', 'examine']  # What shows up in the recent action history
+HISTORY_INDEX = {event: i for i, event in enumerate(HISTORY_EVENTS)}
+
+
+class ObservationEncoder:
+    """
+    Keeps a numeric copy of a game's state up to date by listening to game and player events, and turns
+    it into a fixed-length vector from one player's point of view. The vector holds, with seats listed
+    starting from the observer:
+
+    * the observer's own cards, as a count per role
+    * each seat's coins, influence left and revealed cards per role
+    * how many of each role the observer hasn't seen (in the deck or other players' hands)
+    * the deck size
+    * the last history_length actions, blocks and challenges as (seat, event, target seat), each
+      stored +1 so that 0 means empty
+
+    Other players' hidden cards never make it into the vector.
+    """
+
+    def __init__(self, game, history_length=8):
+        self.game = game
+        self.history_length = history_length
+        self.num_players = len(game.players)
+        self.roles = game.rules.roles  # The variant decides which roles there are
+        self.role_index = {role: i for i, role in enumerate(self.roles)}
+        self.seats = {id(player): seat for seat, player in enumerate(game.players)}
+        self.state_size = self.vector_size(self.num_players, 0, len(self.roles))  # Everything before the history
+        self.size = self.vector_size(self.num_players, history_length, len(self.roles))
+
+        # Column layout, worked out once so events only touch the entries they change
+        n, block = self.num_players, 2 + len(self.roles)
+        self.observers = np.arange(n)
+        # [seat, observer] -> slot of seat as the observer sees it, counting on from the observer like the history does
+        relative = (np.arange(n)[:, None] - self.observers[None, :]) % n
+        self.coin_columns = len(self.roles) + relative * block  # [seat] -> column in each observer's vector
+        self.influence_columns = self.coin_columns + 1
+        self.revealed_columns = self.coin_columns + 2
+        self.unseen_offset = len(self.roles) + n * block
+        self.deck_column = self.unseen_offset + len(self.roles)
+        self.history_offset = self.deck_column + 1
+
+        self.observations = np.zeros((n, self.size), dtype=np.int16)  # One ready-made vector per seat
+        self.refresh()
+        game.listeners.append(self.on_event)
+
+    @staticmethod
+    def vector_size(num_players, history_length=8, num_roles=len(ROLES)):
+        return num_roles + num_players * (2 + num_roles) + num_roles + 1 + 3 * history_length
+
+    def refresh(self):
+        """Rebuilds every vector from the game, used when attaching and after a reset."""
+        self.observations[:] = 0
+        # Role totals come from the cards actually in play so variant decks work too
+        totals = Counter(self.game.deck)
+        for player in self.game.players:
+            totals.update(player.cards)
+            totals.update(player.revealed)
+        self.observations[:, self.unseen_offset:self.deck_column] = [totals[role] for role in self.roles]
+        self.hands = np.zeros((self.num_players, len(self.roles)), dtype=np.int16)
+        for seat, player in enumerate(self.game.players):
+            self.update_coins(seat, player)
+            self.update_hand(seat, player)
+            for card in player.revealed:
+                self.reveal(seat, card)
+
+    def update_coins(self, seat, player):
+        self.observations[self.observers, self.coin_columns[seat]] = player.coins
+
+    def update_hand(self, seat, player):
+        hand = np.zeros(len(self.roles), dtype=np.int16)
+        for card in player.cards:
+            hand[self.role_index[card]] += 1
+        # Only the seat's own vector sees its cards, and its unseen counts move the opposite way
+        self.observations[seat, :len(self.roles)] = hand
+        self.observations[seat, self.unseen_offset:self.deck_column] -= hand - self.hands[seat]
+        self.hands[seat] = hand
+        self.observations[self.observers, self.influence_columns[seat]] = len(player.cards)
+
+    def reveal(self, seat, card):
+        role = self.role_index[card]
+        self.observations[self.observers, self.revealed_columns[seat] + role] += 1
+        self.observations[:, self.unseen_offset + role] -= 1
+
+    def push_history(self, seat, event, target_seat):
+        if not self.history_length:
+            return  # No room for any history
+        history = self.observations[:, self.history_offset:]
+        history[:, :-3] = history[:, 3:].copy()  # Oldest entry drops off the front
+        history[:, -3] = (seat - self.observers) % self.num_players + 1
+        history[:, -2] = HISTORY_INDEX[event] + 1
+        history[:, -1] = (target_seat - self.observers) % self.num_players + 1 if target_seat >= 0 else 0
+
+    def on_event(self, event, player, **details):
+        if event == 'coins':
+            self.update_coins(self.seats[id(player)], player)
+        elif event == 'cards':
+            self.update_hand(self.seats[id(player)], player)
+        elif event == 'influence_lost':
+            seat = self.seats[id(player)]
+            self.reveal(seat, details['card'])
+            self.update_hand(seat, player)
+        elif event in ('action', 'block', 'challenge'):
+            name = event if event != 'action' else details['action']
+            if name in HISTORY_INDEX:
+                target = details.get('target')
+                self.push_history(self.seats[id(player)], name, self.seats[id(target)] if target is not None else -1)
+        elif event == 'reset':
+            self.refresh()
+
+    def encode(self, seat, out=None):
+        """Returns the observation for the player in seat, written into out if given."""
+        if out is None:
+            out = np.empty(self.size, dtype=np.int16)
+        out[:] = self.observations[seat]
+        out[self.deck_column] = len(self.game.deck)
+        return out
+
+    def encode_all(self):
+        """Observations for every seat, one row per seat."""
+        out = self.observations.copy()
+        out[:, self.deck_column] = len(self.game.deck)
+        return out
+
+    @staticmethod
+    def encode_batch(encoders, seats):
+        """Stacks the observations of several games, one (encoder, seat) pair per row."""
+        out = np.zeros((len(encoders), encoders[0].size), dtype=np.int16)
+        for row, (encoder, seat) in enumerate(zip(encoders, seats)):
+            encoder.encode(seat, out[row])
+        return out
@@ -1,5 +1,6 @@
 import random
 from GameLogger import GameLogger
+from Variants import BASE_GAME
 
 
 class Player:
@@ -9,6 +10,13 @@ class Player:
         self.coins = 2  # Starting coins
         self.cards = []  # Starting cards (represents influence)
         self.is_ai = is_ai  # Flag to indicate if this player is AI-controlled
+        self.revealed = []  # Cards lost as influence, face up for everyone to see
+        self.listeners = []  # Called as listener(event, player, **details) whenever the player's state changes
+
+    def notify(self, event, **details):
+        """Tells every listener that the player's state changed."""
+        for listener in self.listeners:
+            listener(event, self, **details)
 
     def display_cards(self):
         """Displays the current cards held by the player, if not AI."""
@@ -20,8 +28,10 @@ class Player:
 
     def choose_action(self, game):
         """Allows the player to choose an action, including bluffing."""
-        actions = ['income', 'foreign_aid', 'coup', 'tax', 'assassinate', 'steal', 'exchange']
-        
+        actions = game.rules.actions
+        if self.coins >= game.rules.forced_coup_threshold:
+            actions = game.rules.forced_actions  # Too rich to do anything but coup
+
         if self.is_ai:
             return self.ai_choose_action(game, actions)
         else:
@@ -47,6 +57,7 @@ class Player:
         if deck:
             new_card = deck.pop()  # Remove a card from the top of the deck
             self.cards.append(new_card)  # Add the new card to the player's hand
+            self.notify('cards')
             print(f"{self.name} draws a new card: {new_card}")
         else:
             print(f"No more cards in the deck to draw for {self.name}.")
@@ -54,7 +65,7 @@ class Player:
     def ai_choose_action(self, game, actions):
         """AI randomly chooses an action and a target (if necessary)."""
         chosen_action = random.choice(actions)
-        if chosen_action in ['coup', 'assassinate', 'steal']:
+        if chosen_action in game.rules.targeted_actions:
             targets = self.get_available_targets(game)
             if targets:
                 chosen_target = random.choice(targets)
@@ -75,7 +86,7 @@ class Player:
         if isinstance(action, tuple):  # Handling AI's action and target
             action, target_player = action
 
-        if action in ['coup', 'assassinate', 'steal']:
+        if action in game.rules.targeted_actions and target_player is None:
             target_player = game.choose_target(self)
 
         # Execute action through the character, passing the game and target player (if any)
@@ -114,15 +125,19 @@ class Player:
     def gain_coins(self, amount):
         """Method for the player to gain coins."""
         self.coins += amount
+        self.notify('coins')
 
     def lose_coins(self, amount):
         """Method for the player to lose coins. Ensures coins don't go negative."""
         self.coins = max(self.coins - amount, 0)
+        self.notify('coins')
 
     def lose_influence(self):
         """Method for the player to lose influence. Influence represents cards in hand."""
         if self.cards:
             lost_card = self.cards.pop()  # Remove a card when losing influence
+            self.revealed.append(lost_card)
+            self.notify('influence_lost', card=lost_card)
             if self.is_ai:
                 print(f"{self.name} loses a card. Remaining cards: {len(self.cards)}")
             else:
@@ -135,53 +150,26 @@ class Player:
         return bool(self.cards)
     
     
-    def verify_card(self, action):
-        """Verifies if the player has the card related to the action."""
-
-        # Map actions to character names
-        action_to_card_map = {
-            'income': None,              # Any character can take 'income' action
-            'foreign_aid': None,         # Any character can take 'foreign_aid' action
-            'coup': None,                # 'Coup' can be done by anyone, doesn't require a specific card
-            'tax': 'Duke',               # 'Duke' can take the 'tax' action
-            'assassinate': 'Assassin',   # 'Assassin' can take the 'assassinate' action
-            'steal': 'Captain',          # 'Captain' can take the 'steal' action
-            'exchange': 'Ambassador',    # 'Ambassador' can take the 'exchange' action
-            'block_foreign_aid': 'Duke', # 'Duke' can block 'foreign_aid'
-            'block_steal': 'Captain',    # 'Captain' can block 'steal'
-            'block_steal_ambassador': 'Ambassador', # 'Ambassador' can also block 'steal'
-            'block_assassinate': 'Contessa',        # 'Contessa' can block 'assassinate'
-    }    
-
-        required_card = action_to_card_map.get(action, None)
-        if required_card is None:  # If no specific card is required for the action
+    def verify_card(self, action, action_to_cards=None):
+        """
+        Verifies if the player has a card related to the action. action_to_cards maps each action
+        to the cards that allow it, and defaults to the base game's.
+        """
+        required_cards = (action_to_cards or BASE_GAME.compile().action_to_cards).get(action)
+        if not required_cards:  # If no specific card is required for the action
             return True  # Cannot bluff if the action doesn't require a card
 
-        # Check if the player has the required card in their hand
-        return required_card in self.cards
+        # Check if the player has one of the required cards in their hand
+        return any(card in self.cards for card in required_cards)
     
-    def shuffle_in_card(self, action, deck):
+    def shuffle_in_card(self, action, deck, action_to_cards=None):
         """
         Shuffles the player's card associated with the action back into the deck 
         and draws a new card from the deck.
         """
-        # Map actions to character names
-        action_to_card_map = {
-            'income': None,              # Any character can take 'income' action
-            'foreign_aid': None,         # Any character can take 'foreign_aid' action
-            'coup': None,                # 'Coup' can be done by anyone, doesn't require a specific card
-            'tax': 'Duke',               # 'Duke' can take the 'tax' action
-            'assassinate': 'Assassin',   # 'Assassin' can take the 'assassinate' action
-            'steal': 'Captain',          # 'Captain' can take the 'steal' action
-            'exchange': 'Ambassador',    # 'Ambassador' can take the 'exchange' action
-            'block_foreign_aid': 'Duke', # 'Duke' can block 'foreign_aid'
-            'block_steal': 'Captain',    # 'Captain' can block 'steal'
-            'block_steal_ambassador': 'Ambassador', # 'Ambassador' can also block 'steal'
-            'block_assassinate': 'Contessa',        # 'Contessa' can block 'assassinate'
-        }    
-
-        card_to_shuffle_back = action_to_card_map.get(action, None)
-        if card_to_shuffle_back and card_to_shuffle_back in self.cards:
+        required_cards = (action_to_cards or BASE_GAME.compile().action_to_cards).get(action, ())
+        card_to_shuffle_back = next((card for card in required_cards if card in self.cards), None)
+        if card_to_shuffle_back:
             # Remove the card from the player's hand and add it to the deck
             self.cards.remove(card_to_shuffle_back)
             deck.append(card_to_shuffle_back)
@@ -196,5 +184,6 @@ class Player:
                 print(f"{self.name} draws a new card: {new_card}")
             else:
                 print(f"No more cards in the deck to draw for {self.name}.")
+            self.notify('cards')
 
     
@@ -0,0 +1,278 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+from BatchRunner import BatchRunner
+from ObservationEncoder import ObservationEncoder
+from Variants import BASE_GAME, VARIANTS
+
+
+REACTIONS = ['pass', 'block', 'challenge']
+FIELDS = ['observation', 'mask', 'action', 'target', 'outcome']
+
+
+def decision_names(rules):
+    """Everything a player can decide under rules, turn or reaction. The variant's actions come first."""
+    return rules.actions + REACTIONS
+
+
+def pending_actions(rules):
+    """What a reaction can be aimed at under rules."""
+    return rules.actions + ['block']
+
+
+DECISIONS = decision_names(BASE_GAME.compile())
+
+
+def observation_size(num_players, history_length=8, variant=None):
+    """Length of the vector built by encode_observation."""
+    rules = (variant or BASE_GAME).compile()
+    return ObservationEncoder.vector_size(num_players, history_length, len(rules.roles)) + 3 + len(pending_actions(rules))
+
+
+def encode_observation(encoder, seat, decision_type, pending_action=None):
+    """
+    The encoder's view of the game for the player in seat, followed by what kind of decision it is
+    (announcing an action, blocking or challenging) and which action it responds to.
+    """
+    pending = pending_actions(encoder.game.rules)
+    observation = np.zeros(encoder.size + 3 + len(pending), dtype=np.int16)
+    encoder.encode(seat, observation[:encoder.size])
+    offset = encoder.size
+    observation[offset + ['action', 'block', 'challenge'].index(decision_type)] = 1
+    offset += 3
+    if pending_action is not None:
+        observation[offset + pending.index(pending_action)] = 1
+    return observation
+
+
+def legal_action_mask(game, player):
+    """
+    Actions the player may announce on their turn, laid out like decision_names(game.rules).
+    Bluffing is allowed, so only coins and targets matter.
+    """
+    rules = game.rules
+    mask = np.zeros(len(rules.actions) + len(REACTIONS), dtype=bool)
+    if player.coins >= rules.forced_coup_threshold:
+        for action in rules.forced_actions:
+            mask[rules.actions.index(action)] = True  # Has to coup
+        return mask
+    has_target = bool(player.get_available_targets(game))
+    for i, action in enumerate(rules.actions):
+        mask[i] = player.coins >= rules.action_costs.get(action, 0) and (has_target or action not in rules.targeted_actions)
+    return mask
+
+
+def reaction_mask(rules, kind):
+    mask = np.zeros(len(rules.actions) + len(REACTIONS), dtype=bool)
+    mask[len(rules.actions) + REACTIONS.index('pass')] = True
+    mask[len(rules.actions) + REACTIONS.index(kind)] = True
+    return mask
+
+
+class ShardWriter:
+    """
+    Buffers decisions in preallocated arrays and writes them out as fixed-size shards, one .npy file
+    per field, so memory stays bounded by a single shard no matter how many games are played.
+    """
+
+    def __init__(self, output_dir, observation_size, shard_size=100000, prefix='shard', mask_size=len(DECISIONS)):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.buffers = {
+            'observation': np.zeros((shard_size, observation_size), dtype=np.int16),
+            'mask': np.zeros((shard_size, mask_size), dtype=bool),
+            'action': np.zeros(shard_size, dtype=np.int8),
+            'target': np.zeros(shard_size, dtype=np.int8),  # Seat offset from the decider, 0 for no target
+            'outcome': np.zeros(shard_size, dtype=np.int8),  # 1 win, -1 loss, 0 no winner
+        }
+        self.size = 0
+        self.shards_written = 0
+        self.decisions = 0
+        self.bytes_written = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, observation, mask, action, target, outcome):
+        row = self.size
+        self.buffers['observation'][row] = observation
+        self.buffers['mask'][row] = mask
+        self.buffers['action'][row] = action
+        self.buffers['target'][row] = target
+        self.buffers['outcome'][row] = outcome
+        self.size += 1
+        self.decisions += 1
+        if self.size == self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if not self.size:
+            return
+        for field in FIELDS:
+            path = os.path.join(self.output_dir, f"{self.prefix}_{self.shards_written:05d}.{field}.npy")
+            np.save(path, self.buffers[field][:self.size])
+            self.bytes_written += os.path.getsize(path)
+        self.shards_written += 1
+        self.size = 0
+
+    def close(self):
+        self.flush()
+
+
+class DecisionRecorder:
+    """
+    Collects (observation, legal-action mask, action, target) for every decision in a game and
+    hands them to a ShardWriter once the game's outcome is known.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = []
+        self.encoder = None
+        self.decision_index = None
+
+    def start_game(self, game):
+        self.pending = []
+        self.encoder = ObservationEncoder(game)
+        self.decision_index = {decision: i for i, decision in enumerate(decision_names(game.rules))}
+
+    def record_action(self, game, player, action):
+        target = None
+        if isinstance(action, tuple):
+            action, target = action
+        self.pending.append((
+            game.players.index(player),
+            encode_observation(self.encoder, game.players.index(player), 'action'),
+            legal_action_mask(game, player),
+            self.decision_index[action],
+            self.target_offset(game, player, target),
+        ))
+
+    def record_reaction(self, game, player, acting_player, action, kind, decision):
+        self.pending.append((
+            game.players.index(player),
+            encode_observation(self.encoder, game.players.index(player), kind, action),
+            reaction_mask(game.rules, kind),
+            self.decision_index[kind if decision else 'pass'],
+            self.target_offset(game, player, acting_player),
+        ))
+
+    @staticmethod
+    def target_offset(game, player, target):
+        if target is None:
+            return 0
+        return (game.players.index(target) - game.players.index(player)) % len(game.players)
+
+    def finish_game(self, game, winner):
+        for seat, observation, mask, action, target in self.pending:
+            outcome = 0 if winner < 0 else (1 if seat == winner else -1)
+            self.writer.add(observation, mask, action, target, outcome)
+        self.pending = []
+
+    def discard_action(self):
+        """Forgets the last recorded action, used when it couldn't be taken (not enough coins or no target)."""
+        self.pending.pop()
+
+    def discard_game(self, game):
+        self.pending = []  # Games that crash or time out have no meaningful outcome
+
+
+class SelfPlayDataset:
+    """Memory-maps every shard in a directory and serves decisions from them without loading them into RAM."""
+
+    def __init__(self, directory):
+        self.shards = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.observation.npy'))):
+            base = path[:-len('.observation.npy')]
+            self.shards.append({field: np.load(f"{base}.{field}.npy", mmap_mode='r') for field in FIELDS})
+        self.offsets = np.cumsum([0] + [len(shard['action']) for shard in self.shards])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        shard_index = int(np.searchsorted(self.offsets, index, side='right')) - 1
+        row = index - self.offsets[shard_index]
+        return {field: self.shards[shard_index][field][row] for field in FIELDS}
+
+    def batches(self, batch_size):
+        """Yields dicts of arrays with at most batch_size rows, never crossing a shard boundary."""
+        for shard in self.shards:
+            for start in range(0, len(shard['action']), batch_size):
+                yield {field: np.asarray(shard[field][start:start + batch_size]) for field in FIELDS}
+
+
+def generate_range(output_dir, start, stop, num_players=2, shard_size=100000, prefix='shard', variant=None):
+    """Plays the games for seeds start..stop-1 under variant and writes their decisions. Returns throughput stats."""
+    rules = (variant or BASE_GAME).compile()
+    writer = ShardWriter(output_dir, observation_size(num_players, variant=variant), shard_size, prefix,
+                         len(decision_names(rules)))
+    runner = BatchRunner(num_players, recorder=DecisionRecorder(writer), variant=variant)
+    started = time.perf_counter()
+    results = runner.run(range(start, stop))
+    writer.close()
+    return {
+        'games': len(results),
+        'errors': sum(1 for result in results if result[3] == 'error'),
+        'decisions': writer.decisions,
+        'shards': writer.shards_written,
+        'bytes': writer.bytes_written,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def generate(output_dir, games, first_seed=0, num_players=2, shard_size=100000, workers=1, variant=None):
+    """
+    Generates a dataset from games self-play games under variant (the base game if None) split over
+    worker processes, writes a manifest next to the shards and returns the throughput report.
+    """
+    started = time.perf_counter()
+    per_worker = -(-games // workers)  # Ceiling division
+    jobs = []
+    for worker in range(workers):
+        start = first_seed + worker * per_worker
+        stop = min(start + per_worker, first_seed + games)
+        if start < stop:
+            jobs.append((output_dir, start, stop, num_players, shard_size, f"w{worker:03d}", variant))
+    if workers == 1:
+        parts = [generate_range(*job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            parts = pool.starmap(generate_range, jobs)
+
+    seconds = time.perf_counter() - started
+    report = {key: sum(part[key] for part in parts) for key in ['games', 'errors', 'decisions', 'shards', 'bytes']}
+    report['seconds'] = seconds
+    report['decisions_per_second'] = report['decisions'] / seconds if seconds else 0.0
+    # Bytes per decision is the same number as megabytes per million decisions
+    report['megabytes_per_million_decisions'] = report['bytes'] / report['decisions'] if report['decisions'] else 0.0
+    report['variant'] = (variant or BASE_GAME).name
+    report['observation_size'] = observation_size(num_players, variant=variant)
+    report['decision_names'] = decision_names((variant or BASE_GAME).compile())
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as manifest:
+        json.dump(report, manifest, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a self-play dataset of decision points.")
+    parser.add_argument('output_dir')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--shard-size', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--variant', default='base', choices=list(VARIANTS))
+    args = parser.parse_args()
+
+    report = generate(args.output_dir, args.games, args.first_seed, args.players, args.shard_size, args.workers,
+                      VARIANTS[args.variant])
+    print(f"{report['games']} games ({report['errors']} errors), {report['decisions']} decisions in {report['seconds']:.2f}s "
+          f"({report['decisions_per_second']:.0f} decisions/s)")
+    print(f"{report['bytes'] / 1e6:.2f} MB on disk in {report['shards']} shards "
+          f"({report['megabytes_per_million_decisions']:.1f} MB per million decisions)")
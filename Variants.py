@@ -0,0 +1,126 @@
+import argparse
+import time
+
+
+# What each role lets its holder do. Roles from expansions go here too
+ROLE_DEFINITIONS = {
+    'Duke': {'actions': ['tax'], 'blocks': ['foreign_aid']},
+    'Assassin': {'actions': ['assassinate'], 'blocks': []},
+    'Captain': {'actions': ['steal'], 'blocks': ['steal']},
+    'Ambassador': {'actions': ['exchange'], 'blocks': ['steal'], 'exchange_cards': 2},
+    'Contessa': {'actions': [], 'blocks': ['assassinate']},
+    'Inquisitor': {'actions': ['exchange', 'examine'], 'blocks': ['steal'], 'exchange_cards': 1},  # Reformation
+}
+GENERAL_ACTIONS = ['income', 'foreign_aid', 'coup']  # Anyone can take these, no card needed
+ACTION_COSTS = {'coup': 7, 'assassinate': 3}
+TARGETED_ACTIONS = ['coup', 'assassinate', 'steal', 'examine']
+
+
+class Rules:
+    """The lookup tables a Variant compiles into. The engine only ever reads these."""
+
+    def __init__(self, variant):
+        unknown = [role for role in variant.roles if role not in ROLE_DEFINITIONS]
+        if unknown:
+            raise ValueError(f"Unknown roles {unknown}, expected roles from {list(ROLE_DEFINITIONS)}")
+
+        self.name = variant.name
+        self.roles = list(variant.roles)
+        self.deck = [role for role in variant.roles for _ in range(variant.copies_per_role)]
+        self.starting_coins = variant.starting_coins
+        self.starting_cards = variant.starting_cards
+        self.forced_coup_threshold = variant.forced_coup_threshold
+        self.forced_actions = ['coup']  # All a player may do once they reach the threshold
+
+        self.actions = list(GENERAL_ACTIONS)
+        self.action_to_cards = {action: () for action in GENERAL_ACTIONS}  # Cards that back up a claim
+        self.block_roles = {}
+        self.exchange_cards = 0
+        for role in self.roles:
+            definition = ROLE_DEFINITIONS[role]
+            for action in definition['actions']:
+                if action not in self.actions:
+                    self.actions.append(action)
+                self.action_to_cards[action] = self.action_to_cards.get(action, ()) + (role,)
+            for action in definition['blocks']:
+                self.block_roles[action] = self.block_roles.get(action, ()) + (role,)
+                self.action_to_cards[f"block_{action}"] = self.block_roles[action]
+            self.exchange_cards = max(self.exchange_cards, definition.get('exchange_cards', 0))
+
+        self.action_costs = {action: cost for action, cost in ACTION_COSTS.items() if action in self.actions}
+        self.targeted_actions = frozenset(action for action in TARGETED_ACTIONS if action in self.actions)
+        if self.forced_coup_threshold < self.action_costs['coup']:
+            # A forced player who can't afford the coup would be stuck on their turn forever
+            raise ValueError(f"Forced coup threshold {self.forced_coup_threshold} is below the coup cost "
+                             f"{self.action_costs['coup']}")
+
+
+class Variant:
+    """
+    A set of house rules or an expansion: which roles are in the deck and how many copies of each,
+    starting coins and cards, and the coin count at which a player has to coup.
+    """
+
+    def __init__(self, name, roles, copies_per_role=3, starting_coins=2, starting_cards=2, forced_coup_threshold=10):
+        self.name = name
+        self.roles = roles
+        self.copies_per_role = copies_per_role
+        self.starting_coins = starting_coins
+        self.starting_cards = starting_cards
+        self.forced_coup_threshold = forced_coup_threshold
+        self.rules = None
+
+    def compile(self):
+        """Builds the variant's Rules the first time and returns the same ones after that."""
+        if self.rules is None:
+            self.rules = Rules(self)
+        return self.rules
+
+
+BASE_GAME = Variant('base', ['Duke', 'Assassin', 'Captain', 'Ambassador', 'Contessa'])
+VARIANTS = {
+    'base': BASE_GAME,
+    'inquisitor': Variant('inquisitor', ['Duke', 'Assassin', 'Captain', 'Inquisitor', 'Contessa']),
+    'big_deck': Variant('big_deck', ['Duke', 'Assassin', 'Captain', 'Ambassador', 'Contessa'], copies_per_role=4),
+    'rich_start': Variant('rich_start', ['Duke', 'Assassin', 'Captain', 'Ambassador', 'Contessa'],
+                          starting_coins=5, forced_coup_threshold=12),
+}
+
+
+def benchmark(variant, games, num_players=2):
+    """Plays games random AI games under variant and returns how fast they went."""
+    from BatchRunner import BatchRunner
+
+    started = time.perf_counter()
+    Rules(variant)
+    compile_seconds = time.perf_counter() - started
+
+    runner = BatchRunner(num_players, variant=variant)
+    started = time.perf_counter()
+    results = runner.run(range(games))
+    seconds = time.perf_counter() - started
+    turns = sum(result[2] for result in results)
+    return {
+        'variant': variant.name,
+        'games': games,
+        'seconds': seconds,
+        'games_per_second': games / seconds if seconds else 0.0,
+        'turns_per_game': turns / games if games else 0.0,
+        'microseconds_per_turn': seconds / turns * 1e6 if turns else 0.0,
+        'compile_microseconds': compile_seconds * 1e6,
+        'errors': sum(1 for result in results if result[3] == 'error'),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark each rules variant with random AI games.")
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=list(VARIANTS))
+    args = parser.parse_args()
+
+    for name in args.variants:
+        report = benchmark(VARIANTS[name], args.games, args.players)
+        print(f"{report['variant']:>12}: {report['games_per_second']:8.0f} games/s, "
+              f"{report['microseconds_per_turn']:6.1f} us/turn, {report['turns_per_game']:5.1f} turns/game, "
+              f"compiled in {report['compile_microseconds']:.0f} us, {report['errors']} errors")
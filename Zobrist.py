@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import os
+import random
+from collections import Counter
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def zobrist_key(*feature):
+    """
+    The random 64-bit key for one feature of the state, e.g. ('coins', seat, 3). Keys are derived from the
+    feature itself rather than drawn from the game's RNG, so they're the same in every game and process
+    and hashing never changes how a seeded game plays out.
+    """
+    return random.Random(repr(feature)).getrandbits(64)
+
+
+class ZobristHash:
+    """
+    Incrementally maintained Zobrist hash of a game: every seat's coins, hand and revealed cards, the
+    deck's composition and whose turn it is. It listens to game events and XORs keys in and out as
+    things change, so reading value is free. Deck order isn't part of the hash, only what's in it.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.seats = {id(player): seat for seat, player in enumerate(game.players)}
+        self.refresh()
+        game.listeners.append(self.on_event)
+
+    def refresh(self):
+        """Recomputes the hash from scratch, used when attaching and after a reset."""
+        self.coins = [player.coins for player in self.game.players]
+        self.hands = [Counter(player.cards) for player in self.game.players]
+        self.revealed = [Counter(player.revealed) for player in self.game.players]
+        self.deck = Counter(self.game.deck)
+        self.turn = self.game.turn_manager.current_turn
+        self.value = self.full_hash()
+
+    def full_hash(self):
+        """Hashes the game directly without using any cached state, handy for checking the incremental value."""
+        value = zobrist_key('turn', self.game.turn_manager.current_turn)
+        for seat, player in enumerate(self.game.players):
+            value ^= zobrist_key('coins', seat, player.coins)
+            for role, count in Counter(player.cards).items():
+                value ^= zobrist_key('hand', seat, role, count)
+            for role, count in Counter(player.revealed).items():
+                value ^= zobrist_key('revealed', seat, role, count)
+        for role, count in Counter(self.game.deck).items():
+            value ^= zobrist_key('deck', role, count)
+        return value
+
+    def toggle_count(self, kind, counts, role, new_count, *seat):
+        """Swaps the key for a role's old count for the key of its new count. A count of 0 has no key."""
+        old_count = counts[role]
+        if old_count == new_count:
+            return
+        if old_count:
+            self.value ^= zobrist_key(kind, *seat, role, old_count)
+        if new_count:
+            self.value ^= zobrist_key(kind, *seat, role, new_count)
+            counts[role] = new_count
+        else:
+            del counts[role]
+
+    def update_hand(self, seat, player):
+        hand = self.hands[seat]
+        new_hand = Counter(player.cards)
+        for role in set(hand) | set(new_hand):
+            self.toggle_count('hand', hand, role, new_hand[role], seat)
+
+    def on_event(self, event, player, **details):
+        if event == 'coins':
+            seat = self.seats[id(player)]
+            self.value ^= zobrist_key('coins', seat, self.coins[seat]) ^ zobrist_key('coins', seat, player.coins)
+            self.coins[seat] = player.coins
+        elif event == 'cards':
+            self.update_hand(self.seats[id(player)], player)
+        elif event == 'influence_lost':
+            seat = self.seats[id(player)]
+            revealed = self.revealed[seat]
+            self.toggle_count('revealed', revealed, details['card'], revealed[details['card']] + 1, seat)
+            self.update_hand(seat, player)
+        elif event == 'deck':
+            card = details['card']
+            self.toggle_count('deck', self.deck, card, self.deck[card] + details['count'])
+        elif event == 'turn':
+            self.value ^= zobrist_key('turn', self.turn) ^ zobrist_key('turn', details['turn'])
+            self.turn = details['turn']
+        elif event == 'reset':
+            self.refresh()
+
+
+class TranspositionTable:
+    """
+    Fixed-size cache of evaluations keyed by Zobrist hash, for search agents. Each hash maps to one slot.
+    A new entry replaces the slot's current one if that entry is from an older search (see new_search)
+    or wasn't searched any deeper, so deep results survive shallow ones within a search.
+    Hit rates and replacement counts are kept so the table can be sized.
+    """
+
+    def __init__(self, size_bits=16):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.keys = [None] * self.size
+        self.values = [None] * self.size
+        self.depths = [0] * self.size
+        self.generations = [0] * self.size
+        self.generation = 0
+        self.used = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0  # A different position was evicted
+        self.rejections = 0  # The new entry lost to a deeper one
+
+    def new_search(self):
+        """Marks everything stored so far as stale, so it gives way to entries from the next search."""
+        self.generation += 1
+
+    def probe(self, key, min_depth=0):
+        """Returns the stored value for key if it was searched at least min_depth deep, otherwise None."""
+        self.probes += 1
+        slot = key & self.mask
+        if self.keys[slot] == key and self.depths[slot] >= min_depth:
+            self.hits += 1
+            self.generations[slot] = self.generation  # Still useful, so don't treat it as stale
+            return self.values[slot]
+        return None
+
+    def store(self, key, value, depth=0):
+        self.stores += 1
+        slot = key & self.mask
+        stored_key = self.keys[slot]
+        if stored_key is None:
+            self.used += 1
+        elif stored_key != key:
+            if self.generations[slot] == self.generation and self.depths[slot] > depth:
+                self.rejections += 1
+                return
+            self.replacements += 1
+        elif self.depths[slot] > depth and self.generations[slot] == self.generation:
+            return  # Already holds a deeper result for this position
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.depths[slot] = depth
+        self.generations[slot] = self.generation
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'fill': self.used / self.size,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate(),
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'rejections': self.rejections,
+        }
+
+
+def measure_hit_rates(games, size_bits_options, num_players=2, first_seed=0):
+    """
+    Plays random AI games and, at every turn, probes then stores the position's hash in one table per
+    size. Returns each table's stats, which shows how big a table the positions actually need.
+    """
+    from BatchRunner import BatchRunner
+
+    tables = [TranspositionTable(size_bits) for size_bits in size_bits_options]
+    runner = BatchRunner(num_players)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for seed in range(first_seed, first_seed + games):
+            game = runner.create_game(seed)
+            zobrist = ZobristHash(game)
+            turns = 0
+            while not game.is_game_over() and turns < runner.max_turns:
+                for table in tables:
+                    if table.probe(zobrist.value) is None:
+                        table.store(zobrist.value, turns)
+                try:
+                    runner.advance(game)
+                except Exception:
+                    break  # Crashing games are the fuzzer's business, not the table's
+                turns += 1
+    return [table.stats() for table in tables]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Report transposition table hit rates for random games.")
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--players', type=int, default=2)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 12, 14, 16, 18], help="Table sizes as powers of two")
+    args = parser.parse_args()
+
+    for stats in measure_hit_rates(args.games, args.sizes, args.players):
+        print(f"{stats['size']:>8} slots: hit rate {stats['hit_rate']:.1%}, fill {stats['fill']:.1%}, "
+              f"{stats['replacements']} replacements, {stats['rejections']} rejections")
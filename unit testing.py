@@ -1,5 +1,23 @@
+import contextlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 from Player import Player  # Import the relevant classes
+from GameManagement import Game, ActionHandler, CardManager
+from BatchRunner import BatchRunner
+from DistributedRunner import Coordinator, Worker, run_local, send_message
+from SelfPlayDataset import SelfPlayDataset, ShardWriter, DecisionRecorder, generate, observation_size
+from ObservationEncoder import ObservationEncoder
+from EventBus import EventBus, SpectatorServer
+from Zobrist import ZobristHash, TranspositionTable
+from Fuzzer import GameFuzzer, dump_violation, fuzz, replay
+from Variants import VARIANTS, Variant
+from Character import Duke, Contessa
 
 class TestPlayer(unittest.TestCase):
 
@@ -18,9 +36,6 @@ class TestPlayer(unittest.TestCase):
         self.player.lose_coins(3)
         self.assertEqual(self.player.coins, 0)  # Coins should not go below 0
 
-if __name__ == '__main__':
-    unittest.main()
-
 
 class TestGame(unittest.TestCase):
 
@@ -28,6 +43,7 @@ class TestGame(unittest.TestCase):
         # Setup a game with players
         self.players = [Player("Player1", None), Player("Player2", None)]
         self.game = Game(self.players)
+        CardManager.distribute_cards(self.players, self.game.deck, self.game.logger)
 
     def test_is_game_over_with_multiple_players(self):
         self.assertFalse(self.game.is_game_over())
@@ -37,9 +53,6 @@ class TestGame(unittest.TestCase):
         self.players[0].cards = []
         self.assertTrue(self.game.is_game_over())
 
-if __name__ == '__main__':
-    unittest.main()
-
 
 class TestActionHandler(unittest.TestCase):
 
@@ -53,5 +66,351 @@ class TestActionHandler(unittest.TestCase):
         self.action_handler.income(player)
         self.assertEqual(player.coins, 3)  # Player should gain 1 coin (starting from 2)
 
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = BatchRunner(num_players=2)
+
+    def test_games_are_reproducible_from_seed(self):
+        self.assertEqual(self.runner.run(range(20)), self.runner.run(range(20)))
+
+    def test_summary_counts_every_game(self):
+        summary = self.runner.summarize(self.runner.run(range(50)))
+        self.assertEqual(summary['games'], 50)
+        self.assertEqual(sum(summary['wins']) + summary['no_winner'] + len(summary['timeouts']) + len(summary['errors']), 50)
+
+
+class TestDistributedRunner(unittest.TestCase):
+
+    def test_local_workers_match_single_process(self):
+        runner = BatchRunner(num_players=2)
+        expected = runner.summarize(runner.run(range(200)))
+        self.assertEqual(run_local(0, 200, num_workers=3, shard_size=25), expected)
+
+    def test_lost_shard_is_redispatched(self):
+        coordinator = Coordinator(0, 40, shard_size=20)
+        results = []
+        server = threading.Thread(target=lambda: results.append(coordinator.serve()), daemon=True)
+        server.start()
+        # A worker that takes a shard and disconnects without reporting back
+        with socket.create_connection(coordinator.address) as sock:
+            send_message(sock, {'type': 'request', 'worker': 'lost'})
+            sock.makefile('r').readline()
+        Worker(coordinator.address, 'survivor').run()
+        server.join(timeout=10)
+        self.assertEqual(results[0]['games'], 40)
+
+class TestSelfPlayDataset(unittest.TestCase):
+
+    def test_generated_shards_load_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report = generate(directory, games=100, shard_size=500)
+            dataset = SelfPlayDataset(directory)
+            self.assertEqual(len(dataset), report['decisions'])
+            self.assertEqual(sum(len(batch['action']) for batch in dataset.batches(128)), report['decisions'])
+            for batch in dataset.batches(500):
+                chosen = batch['mask'][range(len(batch['action'])), batch['action']]
+                self.assertTrue(chosen.all())
+
+    def test_eliminated_players_make_no_decisions(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        recorder = DecisionRecorder(ShardWriter(directory.name, observation_size(4)))
+        runner = BatchRunner(num_players=4, recorder=recorder)
+        rows = []
+        original = recorder.record_reaction
+
+        def record_reaction(game, player, *args):
+            rows.append(player.has_cards())
+            original(game, player, *args)
+
+        recorder.record_reaction = record_reaction
+        runner.run(range(100))
+        self.assertTrue(rows)
+        self.assertTrue(all(rows))
+
+    def test_variant_decisions_are_recorded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report = generate(directory, games=100, shard_size=500, variant=VARIANTS['inquisitor'])
+            dataset = SelfPlayDataset(directory)
+            self.assertEqual(report['errors'], 0)
+            self.assertIn('examine', report['decision_names'])
+            self.assertEqual(dataset[0]['observation'].shape, (report['observation_size'],))
+            self.assertEqual(dataset[0]['mask'].shape, (len(report['decision_names']),))
+            examine = report['decision_names'].index('examine')
+            self.assertTrue(any((batch['action'] == examine).any() for batch in dataset.batches(500)))
+            for batch in dataset.batches(500):
+                self.assertTrue(batch['mask'][range(len(batch['action'])), batch['action']].all())
+
+class TestObservationEncoder(unittest.TestCase):
+
+    def test_incremental_matches_rebuild(self):
+        runner = BatchRunner(num_players=3)
+        for seed in range(20):
+            game = runner.create_game(seed)
+            encoder = ObservationEncoder(game)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                for _ in range(5):
+                    if not game.is_game_over():
+                        game.turn_manager.play_turn()
+            rebuilt = ObservationEncoder(game).encode_all()
+            self.assertTrue((encoder.encode_all()[:, :encoder.state_size] == rebuilt[:, :encoder.state_size]).all())
+
+    def test_no_history(self):
+        game = BatchRunner(num_players=2).create_game(0)
+        encoder = ObservationEncoder(game, history_length=0)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(5):
+                if not game.is_game_over():
+                    game.turn_manager.play_turn()
+        self.assertEqual(encoder.encode(0).shape, (encoder.state_size,))
+
+    def test_seat_slots_match_history(self):
+        game = BatchRunner(num_players=3).create_game(0)
+        encoder = ObservationEncoder(game)
+        for player, coins in zip(game.players, [10, 20, 30]):
+            player.coins = coins
+            player.notify('coins')
+        game.notify('action', game.players[1], action='income', target=None)
+        block = 2 + len(encoder.roles)
+        for observer, expected in enumerate([[10, 20, 30], [20, 30, 10], [30, 10, 20]]):
+            observation = encoder.encode(observer)
+            self.assertEqual([observation[len(encoder.roles) + slot * block] for slot in range(3)], expected)
+            # Latest history entry is (actor slot + 1, event + 1, target slot + 1), and AI_1 holds 20 coins
+            actor_slot = observation[-3] - 1
+            self.assertEqual(observation[len(encoder.roles) + actor_slot * block], 20)
+
+    def test_opponent_cards_are_hidden(self):
+        game = BatchRunner(num_players=2).create_game(0)
+        encoder = ObservationEncoder(game)
+        before, own_before = encoder.encode(0), encoder.encode(1)
+        game.players[1].cards = ['Duke', 'Duke'] if game.players[1].cards != ['Duke', 'Duke'] else ['Contessa', 'Contessa']
+        game.players[1].notify('cards')
+        self.assertTrue((encoder.encode(0) == before).all())
+        self.assertFalse((encoder.encode(1) == own_before).all())
+
+class TestEventBus(unittest.TestCase):
+
+    def play_game(self, bus, seed=0):
+        runner = BatchRunner(num_players=2)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            game = runner.create_game(seed)
+            bus.attach(game)
+            for player in game.players:
+                player.notify('cards')
+            while not game.is_game_over():
+                runner.advance(game)
+            game.announce_winner()
+
+    def drain(self, subscription):
+        events = []
+        while True:
+            event = subscription.get(timeout=0)
+            if event is None:
+                return events
+            events.append(event)
+
+    def test_slow_spectator_only_loses_events(self):
+        bus = EventBus()
+        slow = bus.subscribe(max_queue=5)
+        self.play_game(bus)
+        self.assertLessEqual(len(slow.queue), 5)
+        self.assertGreater(slow.dropped, 0)
+        self.assertEqual(self.drain(slow)[-1]['event'], 'game_over')
+
+    def test_hidden_cards_are_filtered(self):
+        bus = EventBus()
+        public = bus.subscribe(max_queue=100000)
+        viewer = bus.subscribe(viewer='AI_0', max_queue=100000)
+        self.play_game(bus)
+        self.assertFalse(any('cards' in event or event['event'] == 'log' for event in self.drain(public)))
+        seen = [event for event in self.drain(viewer) if 'cards' in event]
+        self.assertTrue(seen)
+        self.assertTrue(all(event['player'] == 'AI_0' for event in seen))
+
+    def test_coalesce_keeps_latest_value(self):
+        bus = EventBus()
+        coalesced = bus.subscribe(policy='coalesce', max_queue=100000)
+        self.play_game(bus)
+        events = self.drain(coalesced)
+        coin_events = [(event['player'], event['coins']) for event in events if event['event'] == 'coins']
+        self.assertEqual(len(coin_events), len(set(player for player, _ in coin_events)))
+
+    def test_coalesce_keeps_games_apart(self):
+        bus = EventBus()
+        coalesced = bus.subscribe(policy='coalesce', max_queue=100000)
+        runner = BatchRunner(num_players=2)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            first, second = runner.create_game(0), runner.create_game(1)
+            bus.attach(first)
+            bus.attach(second)
+            for coins in [3, 4]:
+                first.players[0].coins = coins
+                first.players[0].notify('coins')
+                second.players[0].coins = coins + 10
+                second.players[0].notify('coins')
+        events = [(event['game'], event['player'], event['coins']) for event in self.drain(coalesced)]
+        self.assertEqual(events, [(1, 'AI_0', 4), (2, 'AI_0', 14)])
+
+    def test_bad_max_queue_is_rejected(self):
+        bus = EventBus()
+        for max_queue in [0, -1, '5', None, 2.5]:
+            with self.assertRaises(ValueError):
+                bus.subscribe(max_queue=max_queue)
+        subscription = bus.subscribe(policy='coalesce', max_queue=1)
+        subscription.offer({'seq': 0})  # Malformed events are dropped rather than raised into the game
+        self.assertEqual(subscription.dropped, 1)
+
+    def test_events_keep_their_game_number(self):
+        bus = EventBus()
+        subscription = bus.subscribe(max_queue=100000)
+        runner = BatchRunner(num_players=2)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            first, second = runner.create_game(0), runner.create_game(1)
+            bus.attach(first)
+            bus.attach(second)
+            first.players[0].notify('coins')
+            second.players[0].notify('coins')
+        self.assertEqual([event['game'] for event in self.drain(subscription)], [1, 2])
+
+    def test_tcp_spectator_receives_events(self):
+        bus = EventBus()
+        server = SpectatorServer(bus).start()
+        try:
+            with socket.create_connection(server.address) as sock, sock.makefile('r') as reader:
+                sock.sendall(b'{"policy": "drop_oldest"}\n')
+                while not bus.subscriptions:
+                    time.sleep(0.01)
+                self.play_game(bus)
+                self.assertEqual(json.loads(reader.readline())['event'], 'cards')
+        finally:
+            server.stop()
+
+class TestZobrist(unittest.TestCase):
+
+    def test_incremental_hash_matches_full_hash(self):
+        runner = BatchRunner(num_players=3)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for seed in range(30):
+                game = runner.create_game(seed)
+                zobrist = ZobristHash(game)
+                for _ in range(10):
+                    if game.is_game_over():
+                        break
+                    runner.advance(game)
+                    self.assertEqual(zobrist.value, zobrist.full_hash())
+
+    def test_deeper_entry_survives_within_a_search(self):
+        table = TranspositionTable(size_bits=4)
+        table.store(1, 'deep', depth=5)
+        table.store(17, 'shallow', depth=1)  # Same slot as 1
+        self.assertEqual(table.probe(1), 'deep')
+        self.assertIsNone(table.probe(17))
+        table.new_search()
+        table.store(17, 'shallow', depth=1)
+        self.assertEqual(table.probe(17), 'shallow')
+        self.assertEqual(table.hit_rate(), 2 / 3)
+
+class TestFuzzer(unittest.TestCase):
+
+    def setUp(self):
+        self.fuzzer = GameFuzzer(num_players=2)
+
+    def test_negative_coins_are_caught(self):
+        game = self.fuzzer.runner.create_game(0)
+        game.players[0].coins = -1
+        self.assertIn(('coins', "AI_0 has -1 coins"), self.fuzzer.check(game, 15))
+
+    @staticmethod
+    def check_rich_players(game, card_total):
+        """Stands in for GameFuzzer.check so tests don't depend on a real engine bug."""
+        return [('coins', f"{player.name} is rich") for player in game.players if player.coins >= 5]
+
+    def test_dumped_violation_replays(self):
+        with mock.patch.object(GameFuzzer, 'check', self.check_rich_players):
+            games, counts, samples = self.fuzzer.run(range(20), samples_per_violation=1)
+            self.assertEqual(games, 20)
+            self.assertTrue(samples)
+            with tempfile.TemporaryDirectory() as directory:
+                path = dump_violation(samples[0], directory)
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    replayed = replay(path)
+        self.assertEqual((replayed['message'], replayed['turns']), (samples[0]['message'], samples[0]['turns']))
+        with tempfile.TemporaryDirectory() as directory:
+            path = dump_violation(samples[0], directory)
+            self.assertIsNone(replay(path))  # Fixed once the injected check is gone
+
+    def test_replay_uses_the_dumped_variant(self):
+        fuzzer = GameFuzzer(num_players=2, variant=VARIANTS['rich_start'])
+        with mock.patch.object(GameFuzzer, 'check', self.check_rich_players):
+            games, counts, samples = fuzzer.run(range(1), samples_per_violation=1)
+            self.assertEqual(samples[0]['variant'], 'rich_start')
+            self.assertEqual(samples[0]['turns'], 0)  # Rich from the start, only under rich_start
+            with tempfile.TemporaryDirectory() as directory:
+                path = dump_violation(samples[0], directory)
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    replayed = replay(path)
+        self.assertEqual((replayed['variant'], replayed['turns']), ('rich_start', 0))
+
+    def test_dumps_are_deduplicated(self):
+        with mock.patch.object(GameFuzzer, 'check', self.check_rich_players):
+            with tempfile.TemporaryDirectory() as directory:
+                report = fuzz(20, dump_dir=directory, samples_per_violation=2)
+                self.assertEqual(len(os.listdir(directory)), len(report['samples']))
+        per_message = {violation['message']: violation['count'] for violation in report['counts']}
+        self.assertEqual(set(per_message), {sample['message'] for sample in report['samples']})
+        self.assertTrue(all(count <= 20 for count in per_message.values()))
+        self.assertGreater(sum(per_message.values()), len(report['samples']))  # Counted even when not dumped
+
+    def test_trace_starts_before_dealing(self):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            violations, trace = self.fuzzer.play(0)
+        dealt = [entry for entry in trace[:8] if entry['event'] == 'cards']  # The deal comes before anything else
+        self.assertEqual([entry['player'] for entry in dealt], ['AI_0', 'AI_1'])
+        self.assertTrue(all(len(entry['cards']) == 2 for entry in dealt))
+        self.assertTrue(all('coins' in entry for entry in trace if 'player' in entry))
+
+class TestVariants(unittest.TestCase):
+
+    def test_inquisitor_replaces_ambassador(self):
+        game = BatchRunner(num_players=2, variant=VARIANTS['inquisitor']).create_game(0)
+        cards = game.deck + game.players[0].cards + game.players[1].cards
+        self.assertEqual(cards.count('Inquisitor'), 3)
+        self.assertNotIn('Ambassador', cards)
+        self.assertIn('examine', game.rules.actions)
+        self.assertEqual(game.rules.exchange_cards, 1)
+        self.assertEqual(ObservationEncoder(game).encode(0).shape, (ObservationEncoder.vector_size(2, 8, 5),))
+
+    def test_variant_settings_reach_the_game(self):
+        game = BatchRunner(num_players=2, variant=VARIANTS['rich_start']).create_game(0)
+        self.assertEqual([player.coins for player in game.players], [5, 5])
+        big_deck = BatchRunner(num_players=2, variant=VARIANTS['big_deck']).create_game(0)
+        self.assertEqual(len(big_deck.deck), 20 - 4)
+
+    def test_forced_coup_threshold_must_cover_the_coup(self):
+        with self.assertRaises(ValueError):
+            Variant('cheap', ['Duke', 'Contessa'], forced_coup_threshold=6).compile()
+        self.assertEqual(Variant('exact', ['Duke', 'Contessa'], forced_coup_threshold=7).compile().forced_coup_threshold, 7)
+
+    def test_forced_coup(self):
+        game = BatchRunner(num_players=2).create_game(0)
+        player = game.players[0]
+        player.coins = 10
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            self.assertEqual(player.choose_action(game), ('coup', game.players[1]))
+
+    def test_characters_counteract_through_game(self):
+        game = BatchRunner(num_players=2).create_game(0)
+        self.assertTrue(game.execute_counteraction('block_assassinate', game.players[0], Contessa()))
+        self.assertFalse(game.execute_counteraction('block_assassinate', game.players[0], Duke()))
+
+    def test_every_variant_plays(self):
+        for variant in VARIANTS.values():
+            runner = BatchRunner(num_players=3, variant=variant)
+            summary = runner.summarize(runner.run(range(50)))
+            self.assertEqual(summary['games'], 50)
+
+
 if __name__ == '__main__':
     unittest.main()